@@ -1,21 +1,31 @@
 #!/usr/bin/env python
 
 import os
+import re
 import sys
+import sqlite3
 import typer
-from src.vscdb import VSCDBQuery
+from src.config import load_config
+from src.vscdb import VSCDBQuery, shared_connection
 from src.export import ChatExporter, MarkdownChatFormatter, MarkdownFileSaver
 from rich.console import Console
-from rich.markdown import Markdown
 from loguru import logger
 import json
-import yaml
-import platform
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
+from typing import Iterator
 
 app = typer.Typer()
 console = Console()
 
+DISCOVER_IGNORE_DIRS = [".git", "node_modules", "__pycache__", ".venv", "CachedData", "Cache"]
+
 @app.command()
 def export(
     db_path: str = typer.Argument(None, help="The path to the SQLite database file. If not provided, the latest workspace will be used."),
@@ -29,11 +39,31 @@ def export(
     if not db_path:
         db_path = get_latest_workspace_db_path()
 
+    formatter = MarkdownChatFormatter()
+    saver = MarkdownFileSaver()
+    exporter = ChatExporter(formatter, saver)
+    _export_one(db_path, output_dir, latest_tab, tab_ids, formatter=formatter, exporter=exporter)
+
+def _export_one(
+    db_path: str,
+    output_dir: str | None,
+    latest_tab: bool = False,
+    tab_ids: str | None = None,
+    *,
+    formatter: MarkdownChatFormatter,
+    exporter: ChatExporter,
+    conn: sqlite3.Connection | None = None,
+    immutable: bool = False,
+) -> None:
+    """
+    Export the chats of a single database using already constructed formatter and exporter objects.
+    If `conn` is given, the database is attached to it instead of being opened separately.
+    """
     image_dir = None
 
     try:
         # Query the AI chat data from the database
-        db_query = VSCDBQuery(db_path)
+        db_query = VSCDBQuery(db_path, immutable=immutable, conn=conn)
         chat_data = db_query.query_aichat_data()
 
         if "error" in chat_data:
@@ -42,34 +72,34 @@ def export(
             raise typer.Exit(code=1)
 
         # Convert the chat data from JSON string to dictionary
-        chat_data_dict = json.loads(chat_data[0])
+        chat_data_dict = loads(chat_data[0])
 
-        tab_id_list = None
+        tab_id_set = None
         if latest_tab:
             # Get the latest tab by timestamp
             latest_tab = max(chat_data_dict['tabs'], key=lambda tab: tab.get('timestamp', 0))
             chat_data_dict['tabs'] = [latest_tab]
         elif tab_ids:
             # Filter tabs by provided tab IDs
-            tab_id_list = [int(ti) - 1 for ti in tab_ids.split(',')]
-
-        # Check if there are any images in the chat data
-        has_images = any('image' in bubble for tab in chat_data_dict['tabs'] for bubble in tab.get('bubbles', []))
+            tab_id_set = frozenset(int(ti) - 1 for ti in tab_ids.split(','))
 
-        if has_images and output_dir:
-            image_dir = os.path.join(output_dir, 'images')
-
-        # Format the chat data
-        formatter = MarkdownChatFormatter()
         if output_dir:
-            # Save the chat data
-            saver = MarkdownFileSaver()
-            exporter = ChatExporter(formatter, saver)
-            exporter.export(chat_data_dict, output_dir, image_dir, tab_ids=tab_id_list)
+            # Check if there are any images in the chat data. The raw JSON is scanned first
+            # so the bubbles only need to be walked when an "image" key can be present at all.
+            raw_image_key = b'"image"' if isinstance(chat_data[0], bytes) else '"image"'
+            has_images = raw_image_key in chat_data[0] and any('image' in bubble for tab in chat_data_dict['tabs'] for bubble in tab.get('bubbles', []))
+            if has_images:
+                image_dir = os.path.join(output_dir, 'images')
+
+            # Format and save the chat data
+            exporter.export(chat_data_dict, output_dir, image_dir, tab_ids=tab_id_set)
             success_message = f"Chat data has been successfully exported to {output_dir}"
             logger.info(success_message)
         else:
-            formatted_chats = formatter.format(chat_data_dict, image_dir, tab_ids=tab_id_list)
+            from rich.markdown import Markdown
+
+            # Format the chat data
+            formatted_chats = formatter.format(chat_data_dict, image_dir, tab_ids=tab_id_set)
             # Print the chat data to the command line using markdown
             for formatted_data in formatted_chats:
                 console.print(Markdown(formatted_data))
@@ -92,7 +122,26 @@ def export(
         logger.error(error_message)
         raise typer.Exit(code=1)
 
+def _export_one_standalone(db_path: str, output_dir: str, immutable: bool = False) -> None:
+    """
+    Export a single database from a worker process, reusing the worker's exporter and shared connection.
+    """
+    exporter = _worker_exporter()
+    _export_one(db_path, output_dir, formatter=exporter.formatter, exporter=exporter, conn=_worker_connection(), immutable=immutable)
+
+@lru_cache(maxsize=1)
+def _worker_exporter() -> ChatExporter:
+    # One formatter, saver and exporter per worker process, reused for every database it exports
+    return ChatExporter(MarkdownChatFormatter(), MarkdownFileSaver())
+
+@lru_cache(maxsize=1)
+def _worker_connection() -> sqlite3.Connection:
+    # One connection per worker process, reused for every database it exports
+    return shared_connection()
+
 def get_cursor_workspace_path() -> Path:
+    import platform
+
     config_path = Path("config.yml")
     logger.debug(f"Looking for configuration file at: {config_path}")
     
@@ -101,8 +150,7 @@ def get_cursor_workspace_path() -> Path:
         logger.error(error_message)
         raise FileNotFoundError(error_message)
 
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
+    config = load_config(str(config_path))
     logger.debug("Configuration file loaded successfully")
 
     system = platform.system()
@@ -126,7 +174,10 @@ def get_cursor_workspace_path() -> Path:
 
 def get_latest_workspace_db_path() -> str:
     base_path = get_cursor_workspace_path()
-    workspace_folder = max(base_path.glob("*"), key=os.path.getmtime)
+    # DirEntry caches its stat result, so each folder is stat'ed only once
+    with os.scandir(base_path) as entries:
+        latest_entry = max((entry for entry in entries if entry.is_dir()), key=lambda entry: entry.stat().st_mtime)
+    workspace_folder = Path(latest_entry.path)
     db_path = workspace_folder / "state.vscdb"
     
     if not db_path.exists():
@@ -134,11 +185,32 @@ def get_latest_workspace_db_path() -> str:
 
     return str(db_path)
 
+def _find_state_files(directory: str, ignored_dirs: set[str]) -> Iterator[tuple[str, float]]:
+    """
+    Yield the path and modification time of all state.vscdb files below a directory, skipping ignored directory names.
+    """
+    pending = [directory]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            # Unreadable directories are skipped, as os.walk does
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in ignored_dirs:
+                        pending.append(entry.path)
+                elif entry.name == 'state.vscdb':
+                    # Reuse the directory entry's stat instead of a separate os.path.getmtime call
+                    yield entry.path, entry.stat().st_mtime
+
 @app.command()
 def discover(
     directory: str = typer.Argument(None, help="The directory to search for state.vscdb files. If not provided, the default Cursor workspace storage directory will be used."),
     limit: int = typer.Option(None, help="The maximum number of state.vscdb files to process. Defaults to 10 if search_text is not provided, else -1."),
-    search_text: str = typer.Option(None, help="The text to search for in the chat history.")
+    search_text: str = typer.Option(None, help="The text to search for in the chat history. Message text, selections and AI model names are searched."),
+    ignore: list[str] = typer.Option(None, help=f"Additional directory names to skip while searching, on top of {', '.join(DISCOVER_IGNORE_DIRS)}. Can be given multiple times.")
 ):
     """
     Discover all state.vscdb files in a directory and its subdirectories, and print a few lines of dialogue.
@@ -150,20 +222,21 @@ def discover(
         limit = -1 if search_text else 10
 
     try:
-        state_files = []
-        for root, _, files in os.walk(directory):
-            if 'state.vscdb' in files:
-                db_path = os.path.join(root, 'state.vscdb')
-                state_files.append((db_path, os.path.getmtime(db_path)))
-
-        # Sort files by modification time (newest first)
-        state_files.sort(key=lambda x: x[1], reverse=True)
+        # Collect the files sorted by modification time (newest first)
+        state_files = sorted(_find_state_files(directory, set(DISCOVER_IGNORE_DIRS).union(ignore or [])), key=lambda x: x[1], reverse=True)
 
         # Only process the newest files up to the specified limit, unless limit is -1
         if limit != -1:
             state_files = state_files[:limit]
 
         results = []
+        formatter = MarkdownChatFormatter()
+
+        needle = search_text.lower() if search_text else None
+        # Compiled once so the per-line check runs in C without lowercasing every line
+        search_line = re.compile(re.escape(search_text), re.IGNORECASE).search if search_text else None
+        # The raw JSON can only be used as a pre-filter when the search text needs no JSON escaping
+        raw_filter = needle is not None and json.dumps(needle, ensure_ascii=False)[1:-1] == needle
 
         # Process the files
         for db_path, _ in state_files:
@@ -176,24 +249,39 @@ def discover(
             elif not chat_data:
                 logger.debug(f"No chat data found in {db_path}")
             else:
-                chat_data_dict = json.loads(chat_data[0])
-                formatter = MarkdownChatFormatter()
-                formatted_chats = formatter.format(chat_data_dict, image_dir=None)
+                if raw_filter:
+                    # ItemTable.value is a BLOB, so the raw value may come back as bytes
+                    raw_text = chat_data[0].decode('utf-8', errors='replace') if isinstance(chat_data[0], bytes) else chat_data[0]
+                    if needle not in raw_text.lower():
+                        logger.debug(f"No chat entries containing '{search_text}' found in {db_path}")
+                        continue
+
+                chat_data_dict = loads(chat_data[0])
+
+                if needle is not None:
+                    # Only format the tabs whose bubbles contain the search text
+                    formatted_chats = formatter.format_matching(chat_data_dict, needle) or {}
+                else:
+                    formatted_chats = formatter.format(chat_data_dict, image_dir=None) or {}
                 
                 if search_text:
-                    # Filter the formatted data to include only lines containing the search text
-                    for formatted_data in formatted_chats:
-                        filtered_lines = [line for line in formatted_data.splitlines() if search_text.lower() in line.lower()]
-                        if filtered_lines:
-                            results.append((db_path, "\n".join(formatted_data.splitlines()[:10]) + "\n..."))
-                    if not filtered_lines:
+                    # Keep only the tabs that have lines containing the search text
+                    found = False
+                    for formatted_data in formatted_chats.values():
+                        lines = formatted_data.splitlines()
+                        if any(search_line(line) for line in lines):
+                            found = True
+                            results.append((db_path, "\n".join(lines[:10]) + "\n..."))
+                    if not found:
                         logger.debug(f"No chat entries containing '{search_text}' found in {db_path}")
                 else:
                     # Collect the first few lines of the formatted chat data
-                    for formatted_data in formatted_chats:
+                    for formatted_data in formatted_chats.values():
                         results.append((db_path, "\n".join(formatted_data.splitlines()[:10]) + "\n..."))
 
         # Print all results at the end
+        from rich.markdown import Markdown
+
         console.print('\n\n')
         if results:
             for db_path, result in results:
@@ -222,6 +310,7 @@ def discover(
 def export_all(
     output_dir: str = typer.Option(os.path.join(os.getcwd(), "out"), help="The directory where the output markdown files will be saved."),
     cursor_workspace_path: str = typer.Option(None, help="Path to the Cursor workspace directory. Usually does not need to be provided."),
+    immutable: bool = typer.Option(False, "--immutable", help="Open the databases as immutable for faster reads. Only use this when Cursor is closed or on a copy of the workspace directory."),
 ):
     """Export all chats from every workspace database to markdown files."""
     try:
@@ -235,28 +324,36 @@ def export_all(
         output_base = Path(output_dir)
         output_base.mkdir(exist_ok=True, parents=True)
 
-        success_count = 0
-        for db_path in db_paths:
-            workspace_id = db_path.parent.name
-            output_path = output_base / workspace_id
-            
-            try:
-                output_path.mkdir(exist_ok=True, parents=True)
-                logger.info(f"Exporting {db_path}...")
-                
-                export(
-                    db_path=str(db_path),
-                    output_dir=str(output_path),
-                    latest_tab=False,
-                    tab_ids=None
-                )
-                
-                success_count += 1
-                logger.success(f"Successfully exported {workspace_id}")
-                
-            except Exception as e:
-                logger.error(f"Failed to export {workspace_id}: {str(e)}")
-                continue
+        futures = {}
+        max_workers = min(os.cpu_count() or 1, len(db_paths))
+        if sys.platform == "win32":
+            # ProcessPoolExecutor rejects more than 61 workers on Windows
+            max_workers = min(max_workers, 61)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for db_path in db_paths:
+                workspace_id = db_path.parent.name
+                output_path = output_base / workspace_id
+
+                try:
+                    # output_base already exists, so a single mkdir is enough for each workspace
+                    try:
+                        os.mkdir(output_path)
+                    except FileExistsError:
+                        pass
+                    logger.info(f"Exporting {db_path}...")
+                    futures[executor.submit(_export_one_standalone, str(db_path), str(output_path), immutable)] = workspace_id
+                except Exception as e:
+                    logger.error(f"Failed to export {workspace_id}: {str(e)}")
+
+            success_count = 0
+            for future in as_completed(futures):
+                workspace_id = futures[future]
+                try:
+                    future.result()
+                    success_count += 1
+                    logger.success(f"Successfully exported {workspace_id}")
+                except Exception as e:
+                    logger.error(f"Failed to export {workspace_id}: {str(e)}")
 
         logger.info(f"Export completed: {success_count}/{len(db_paths)} workspaces processed successfully")
 
@@ -0,0 +1,27 @@
+import os
+from functools import lru_cache
+from typing import Any
+
+@lru_cache(maxsize=4)
+def _load_config(config_path: str, mtime: float) -> dict[str, Any]:
+    import yaml
+    try:
+        from yaml import CSafeLoader as YAMLLoader
+    except ImportError:
+        from yaml import SafeLoader as YAMLLoader
+
+    # mtime is part of the cache key so edits to the file are picked up
+    with open(config_path, 'r') as f:
+        return yaml.load(f, Loader=YAMLLoader)
+
+def load_config(config_path: str = 'config.yml') -> dict[str, Any]:
+    """
+    Load the YAML configuration file, reusing the parsed result until the file changes.
+
+    Args:
+        config_path (str): The path to the configuration file. Defaults to 'config.yml'.
+
+    Returns:
+        dict[str, Any]: The parsed configuration.
+    """
+    return _load_config(config_path, os.stat(config_path).st_mtime)
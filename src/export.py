@@ -3,7 +3,7 @@ import shutil
 import os
 import json
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Container
 from loguru import logger
 import traceback
 
@@ -61,13 +61,13 @@ class MarkdownChatFormatter(ChatFormatter):
 
         return user_text_text
     
-    def format(self, chat_data: dict[str, Any], image_dir: str | None = 'images', tab_ids: list[int] | None = None) -> dict[int, str] | None:
+    def format(self, chat_data: dict[str, Any], image_dir: str | None = 'images', tab_ids: Container[int] | None = None) -> dict[int, str] | None:
         """Format the chat data into Markdown format.
 
         Args:
             chat_data (dict[str, Any]): The chat data to format.
             image_dir (str): The directory where images will be saved. Defaults to 'images'.
-            tab_ids (list[int]): List of tab indices to include exclusively.
+            tab_ids (Container[int]): Tab indices to include exclusively, preferably a set.
 
         Returns:
             dict[int, str]: The formatted chat in Markdown for each tab.
@@ -129,6 +129,44 @@ class MarkdownChatFormatter(ChatFormatter):
             logger.error(f"Unexpected error: {e}. Full traceback: {traceback.format_exc()}")
             return
 
+    def _bubble_contains(self, bubble: dict, needle: str) -> bool:
+        # Search the same text that `format` renders for the bubble
+        if bubble.get('type') == 'user':
+            texts = [self._extract_text_from_user_bubble(bubble)]
+            if bubble.get('selections'):
+                texts.extend(s.get('text') for s in bubble['selections'])
+        elif bubble.get('type') == 'ai':
+            texts = [bubble.get('rawText'), bubble.get('modelType')]
+        else:
+            return False
+        return any(needle in text.lower() for text in texts if isinstance(text, str))
+
+    def format_matching(self, chat_data: dict[str, Any], needle: str, image_dir: str | None = None) -> dict[int, str] | None:
+        """Format only the tabs whose bubble text contains the search text.
+
+        The message text, selections and AI model names are searched, but not the
+        headings that `format` adds (such as "User:" or "Chat Transcript").
+
+        Args:
+            chat_data (dict[str, Any]): The chat data to format.
+            needle (str): The lowercase text to search for.
+            image_dir (str): The directory where images will be saved. Defaults to None.
+
+        Returns:
+            dict[int, str]: The formatted chat in Markdown for each matching tab.
+        """
+        try:
+            tab_ids = {
+                tab_index for tab_index, tab in enumerate(chat_data['tabs'])
+                if any(self._bubble_contains(bubble, needle) for bubble in tab.get('bubbles', []))
+            }
+        except Exception as e:
+            logger.error(f"Unexpected error: {e}. Full traceback: {traceback.format_exc()}")
+            return
+        if not tab_ids:
+            return {}
+        return self.format(chat_data, image_dir, tab_ids=tab_ids)
+
 class FileSaver(ABC):
     @abstractmethod
     def save(self, formatted_data: str, file_path: str) -> None:
@@ -168,7 +206,7 @@ class ChatExporter:
         self.formatter = formatter
         self.saver = saver
 
-    def export(self, chat_data: dict[str, Any], output_dir: str, image_dir: str, tab_ids: list[int] | None = None) -> None:
+    def export(self, chat_data: dict[str, Any], output_dir: str, image_dir: str, tab_ids: Container[int] | None = None) -> None:
         """Export the chat data by formatting and saving it.
 
         Args:
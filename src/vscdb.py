@@ -1,20 +1,75 @@
 import os
 import sqlite3
-import yaml
 from typing import Any
 from loguru import logger
+from src.config import load_config
+
+ATTACHED_SCHEMA = "workspace"
+
+def shared_connection() -> sqlite3.Connection:
+    """
+    Create an empty in-memory connection that workspace databases can be attached to one after another.
+
+    Returns:
+        sqlite3.Connection: The shared connection.
+    """
+    # uri=True is required for ATTACH to accept the file: URIs used by VSCDBQuery
+    conn = sqlite3.connect(":memory:", uri=True)
+    conn.execute("PRAGMA query_only=1")
+    return conn
 
 class VSCDBQuery:
-    def __init__(self, db_path: str) -> None:
+    def __init__(self, db_path: str, immutable: bool = False, conn: sqlite3.Connection | None = None) -> None:
         """
         Initialize the VSCDBQuery with the path to the SQLite database.
 
         Args:
             db_path (str): The path to the SQLite database file.
+            immutable (bool): Open the database with immutable=1, skipping journal and lock checks. Only use this
+                when Cursor is closed or the file is a copy, as pending writes are not seen. Defaults to False.
+            conn (sqlite3.Connection | None): A long-lived connection (see `shared_connection`) to attach
+                the database to for each query, instead of opening a new connection. Defaults to None.
         """
         self.db_path = db_path
+        self.immutable = immutable
+        self.conn = conn
         logger.info(f"Database path: {os.path.join(os.path.basename(os.path.dirname(self.db_path)), os.path.basename(self.db_path))}")
 
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open a read-only connection to the database, or attach it to the shared connection.
+
+        Returns:
+            sqlite3.Connection: The database connection.
+        """
+        mode = "ro&immutable=1" if self.immutable else "ro"
+
+        if self.conn is not None:
+            # Unqualified table names in queries resolve to the attached schema
+            # because the shared connection's main database is empty.
+            self.conn.execute(f"ATTACH DATABASE ? AS {ATTACHED_SCHEMA}", (f"file:{self.db_path}?mode={mode}",))
+            self.conn.execute(f"PRAGMA {ATTACHED_SCHEMA}.mmap_size=268435456")
+            self.conn.execute(f"PRAGMA {ATTACHED_SCHEMA}.cache_size=-65536")
+            return self.conn
+
+        conn = sqlite3.connect(f'file:{self.db_path}?mode={mode}', uri=True)
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA query_only=1")
+        return conn
+
+    def _disconnect(self, conn: sqlite3.Connection) -> None:
+        """
+        Close the connection opened by `_connect`, or detach the database from the shared connection.
+
+        Args:
+            conn (sqlite3.Connection): The connection returned by `_connect`.
+        """
+        if self.conn is not None:
+            conn.execute(f"DETACH DATABASE {ATTACHED_SCHEMA}")
+        else:
+            conn.close()
+
     def query_to_json(self, query: str) -> list[Any] | dict[str, str]:
         """
         Execute a SQL query and return the results as a JSON-compatible list.
@@ -27,11 +82,13 @@ class VSCDBQuery:
         """
         try:
             logger.debug(f"Executing query: {query}")
-            conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True)
-            cursor = conn.cursor()
-            cursor.execute(query)
-            rows = cursor.fetchall()
-            conn.close()
+            conn = self._connect()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(query)
+                rows = cursor.fetchall()
+            finally:
+                self._disconnect(conn)
 
             if len(rows) == 0:
                 e = "No chat data found in database."
@@ -56,9 +113,10 @@ class VSCDBQuery:
         Returns:
             list[Any] | dict[str, str]: The AI chat data as a list, or an error message as a dictionary.
         """
+        import yaml
+
         try:
-            with open('config.yml', 'r') as config_file:
-                config = yaml.safe_load(config_file)
+            config = load_config('config.yml')
             query = config['aichat_query']
             logger.debug("Loaded AI chat query from config.yaml")
             return self.query_to_json(query)